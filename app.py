@@ -5,10 +5,8 @@
 #import packages
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from datetime import datetime
 import warnings
-from lifelines import KaplanMeierFitter, NelsonAalenFitter
 
 #import files
 import structure_loan_data
@@ -94,14 +92,15 @@ st.divider(width="stretch")
 # In[ ]:
 # Load Data
 loan_data = structure_loan_data.structure_loan_data('loan_data.csv')
+survival_data = structure_loan_data.prepare_survival_data(loan_data, '01-31-2025')
 # start of Fed rate increase simulation
 mid_date = datetime(2022, 4, 1)
-loan_data['rate_status'] = loan_data['open_date'].apply(lambda x: 'Pre-Fed Rate Increase' if x < mid_date else 'Post-Fed Rate Increase')
-survival_data = structure_loan_data.prepare_survival_data(loan_data, '01-31-2025')
-survival_data['risk_rate_segment'] = survival_data.apply(lambda row: f"{row['score_bucket']}, {row['rate_status']}", axis=1)
+survival_data = structure_loan_data.assign_risk_segments(survival_data, mid_date)
 
 # In[ ]:
 #Import kmf and naf objects
+from lifelines import KaplanMeierFitter, NelsonAalenFitter
+
 with warnings.catch_warnings():
     warnings.simplefilter("ignore")
     # Initialize Kaplan-Meier Fitter
@@ -1,21 +1,106 @@
 #import packages
 import pandas as pd
-import streamlit as st
-import matplotlib.pyplot as plt
 import warnings
-from lifelines import KaplanMeierFitter
+
+
+def fit_survival_segments(survival_data, rate_period, score_tier):
+    """
+    Split survival data into the selected risk segments and fit a Kaplan-Meier curve to each.
+    Segments are by rate period when no score tier is selected, by score tier when no rate period is selected,
+    and by both otherwise. Returns (segment, segment_data, kmf) tuples; kmf is None for segments with no loans.
+    """
+    from lifelines import KaplanMeierFitter
+
+    if len(score_tier) == 0:
+        segments = [(rate, 'rate_status') for rate in rate_period]
+    elif len(rate_period) == 0:
+        segments = [(score, 'score_bucket') for score in score_tier]
+    else:
+        segments = [(f"{score}, {rate}", 'risk_rate_segment') for rate in rate_period for score in score_tier]
+
+    fits = []
+    for segment, segment_col in segments:
+        # Filter data for this segment
+        segment_data = survival_data[survival_data[segment_col] == segment]
+        kmf = None
+        if len(segment_data) > 0:
+            defaults = int(segment_data['event'].sum())
+            default_rate = (defaults / len(segment_data)) * 100
+
+            # Fit Kaplan-Meier for this segment
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                kmf = KaplanMeierFitter()
+                kmf.fit(
+                    durations=segment_data['duration_months'],
+                    event_observed=segment_data['event'],
+                    label=f'{segment} ({defaults} defaults | {round(default_rate, 1)}% default rate)'
+                    )
+        fits.append((segment, segment_data, kmf))
+    return fits
+
+
+def summarize_survival_segments(fits):
+    """
+    Build the numeric summary (rates and survival probabilities as fractions) and the long dataframe
+    of survival curve points from the output of fit_survival_segments.
+    Segments with no loans get sample_size 0 and NaN rates.
+    """
+    summary_rows = []
+    curve_frames = []
+    for segment, segment_data, kmf in fits:
+        total_loans = len(segment_data)
+        defaults = int(segment_data['event'].sum())
+        row = {
+            'risk_segment': segment,
+            'default_rate': float('nan'),
+            'median_time_to_default': float('nan'),
+            'survival_12mo': float('nan'),
+            'survival_24mo': float('nan'),
+            'survival_36mo': float('nan'),
+            'defaults': defaults,
+            'sample_size': total_loans
+        }
+        if kmf is not None:
+            row['default_rate'] = defaults / total_loans
+            row['median_time_to_default'] = float(segment_data['duration_months'].median())
+            row['survival_12mo'] = float(kmf.survival_function_at_times(12).values[0])
+            row['survival_24mo'] = float(kmf.survival_function_at_times(24).values[0])
+            row['survival_36mo'] = float(kmf.survival_function_at_times(36).values[0])
+            curve_frames.append(pd.DataFrame({
+                'risk_segment': segment,
+                'timeline': kmf.survival_function_.index.values.astype(float),
+                'survival': kmf.survival_function_.iloc[:, 0].values.astype(float)
+            }))
+        summary_rows.append(row)
+
+    summary = pd.DataFrame(summary_rows, columns=['risk_segment', 'default_rate', 'median_time_to_default',
+                                                  'survival_12mo', 'survival_24mo', 'survival_36mo',
+                                                  'defaults', 'sample_size'])
+    curves = pd.concat(curve_frames, ignore_index=True) if curve_frames else \
+        pd.DataFrame(columns=['risk_segment', 'timeline', 'survival'])
+    return summary, curves
+
+
+def compute_survival_summary(survival_data, rate_period, score_tier):
+    """
+    Numeric counterpart of the summary table in create_combined_survival_analysis, without plotting.
+    Returns a summary dataframe and a long dataframe of the survival curve points for each segment.
+    """
+    return summarize_survival_segments(fit_survival_segments(survival_data, rate_period, score_tier))
+
+
+def format_percent(value):
+    #Format a fraction as a percent string for display, e.g. 0.9534 -> '95.3%'
+    if pd.isna(value):
+        return 'N/A'
+    return f"{round(value * 100, 1)}%"
 
 
 def create_combined_survival_analysis(survival_data, rate_period, score_tier, colors, baseline=True):
-    #create table segments for dataframe
-    risk_segment_col = []
-    default_rate_col = []
-    median_time_to_default_col = []
-    survival_12mo_col = []
-    survival_24mo_col = []
-    survival_36mo_col = []
-    default_size_col = []
-    sample_size_col = []
+    #plotting and fitting libraries are heavy, so only load them when a chart is rendered
+    import matplotlib.pyplot as plt
+    from lifelines import KaplanMeierFitter
 
     fig = plt.figure(figsize=(16, 8))
 
@@ -24,9 +109,9 @@ def create_combined_survival_analysis(survival_data, rate_period, score_tier, co
             warnings.simplefilter("ignore")
             # Initialize Kaplan-Meier Fitter
             kmf = KaplanMeierFitter()
-                    
+
             # Fit the survival curve
-            kmf.fit(survival_data['duration_months'], 
+            kmf.fit(survival_data['duration_months'],
                             survival_data['event'],
                             label='Portfolio Baseline Survival Rate')
         return kmf
@@ -35,137 +120,22 @@ def create_combined_survival_analysis(survival_data, rate_period, score_tier, co
     if baseline == True:
         baseline = kmf.plot_survival_function(ci_alpha = 0.0, color='black', linewidth=2, linestyle = '--', label='Baseline Survival Rate')
     if baseline == False:
-        baseline = plt.subplot(1,1,1) # Create empty subplot for custom plotting    
-
-    if len(score_tier) == 0:
-        for i, rate in enumerate(rate_period):
-            segment = f"{rate}"
-            # Filter data for this segment
-            segment_data = survival_data[survival_data['rate_status'] == segment]
-            for i in colors:
-                    if i['label'] == segment:
-                        color = i['color']
-
-            # Calculate basic metrics
-            total_loans = len(segment_data)
-            defaults = segment_data['event'].sum()
-            default_rate = (defaults / total_loans) * 100
-
-            risk_segment_col.append(segment)
-            default_rate_col.append(round(default_rate, 1).astype(str) + '%')
-            median_time_to_default_col.append(round(segment_data['duration_months'].median().astype(float), 1))
-            default_size_col.append(defaults)
-            sample_size_col.append(total_loans)
-                        
-            # Fit Kaplan-Meier for this segment
-            kmf = KaplanMeierFitter()
-            kmf.fit(
-                durations=segment_data['duration_months'],
-                event_observed=segment_data['event'],
-                label=f'{segment} ({defaults} defaults | {round(default_rate, 1)}% default rate)'
+        baseline = plt.subplot(1,1,1) # Create empty subplot for custom plotting
+
+    fits = fit_survival_segments(survival_data, rate_period, score_tier)
+    for segment, segment_data, kmf in fits:
+        if kmf is None:
+            continue
+        color = next((i['color'] for i in colors if i['label'] == segment), None)
+
+        # Plot survival curve
+        plot_objects = kmf.plot_survival_function(
+                ax=baseline,
+                color=color,
+                linewidth=3,
+                alpha=0.8,
+                ci_alpha=0.1  # Light confidence interval
                 )
-                        
-            # Plot survival curve
-            plot_objects = kmf.plot_survival_function(
-                    ax=baseline,
-                    color=color, 
-                    linewidth=3,
-                    alpha=0.8,
-                    ci_alpha=0.1  # Light confidence interval
-                    )
-            
-    elif len(rate_period) == 0:
-        for i, score in enumerate(score_tier):
-            segment = f"{score}"
-            # Filter data for this segment
-            segment_data = survival_data[survival_data['score_bucket'] == segment]
-            for i in colors:
-                    if i['label'] == segment:
-                        color = i['color']
-
-            # Calculate basic metrics
-            total_loans = len(segment_data)
-            defaults = segment_data['event'].sum()
-            default_rate = (defaults / total_loans) * 100
-
-            risk_segment_col.append(segment)
-            default_rate_col.append(round(default_rate, 1).astype(str) + '%')
-            median_time_to_default_col.append(round(segment_data['duration_months'].median().astype(float), 1))
-            default_size_col.append(defaults)
-            sample_size_col.append(total_loans)
-                        
-            # Fit Kaplan-Meier for this segment
-            kmf = KaplanMeierFitter()
-            kmf.fit(
-                durations=segment_data['duration_months'],
-                event_observed=segment_data['event'],
-                label=f'{segment} ({defaults} defaults | {round(default_rate, 1)}% default rate)'
-                )
-            survival_prob_12 = kmf.survival_function_at_times(12).values[0]
-            survival_12mo_col.append(round(survival_prob_12*100, 1).astype(str) + '%')
-
-            survival_prob_24 = kmf.survival_function_at_times(24).values[0]
-            survival_24mo_col.append(round(survival_prob_24*100, 1).astype(str) + '%')
-
-            survival_prob_36 = kmf.survival_function_at_times(36).values[0]
-            survival_36mo_col.append(round(survival_prob_36*100, 1).astype(str) + '%')
-
-            # Plot survival curve
-            plot_objects = kmf.plot_survival_function(
-                    ax=baseline,
-                    color=color, 
-                    linewidth=3,
-                    alpha=0.8,
-                    ci_alpha=0.1  # Light confidence interval
-                    )
-            
-    else:
-        for i, rate in enumerate(rate_period):
-            for j, score in enumerate(score_tier):
-                segment = f"{score}, {rate}"
-                # Filter data for this segment
-                segment_data = survival_data[survival_data['risk_rate_segment'] == segment]
-                    
-                for i in colors:
-                    if i['label'] == segment:
-                        color = i['color']
-
-                # Calculate basic metrics
-                total_loans = len(segment_data)
-                defaults = segment_data['event'].sum()
-                default_rate = (defaults / total_loans) * 100
-
-                risk_segment_col.append(segment)
-                default_rate_col.append(round(default_rate, 1).astype(str) + '%')
-                median_time_to_default_col.append(round(segment_data['duration_months'].median(), 1).astype(str))
-                default_size_col.append(defaults)
-                sample_size_col.append(total_loans)
-                        
-                # Fit Kaplan-Meier for this segment
-                kmf = KaplanMeierFitter()
-                kmf.fit(
-                    durations=segment_data['duration_months'],
-                    event_observed=segment_data['event'],
-                    label=f'{segment} ({defaults} defaults | {round(default_rate, 1)}% default rate)'
-                    )
-                survival_prob_12 = kmf.survival_function_at_times(12).values[0]
-                survival_12mo_col.append(round(survival_prob_12*100, 1).astype(str) + '%')
-
-                survival_prob_24 = kmf.survival_function_at_times(24).values[0]
-                survival_24mo_col.append(round(survival_prob_24*100, 1).astype(str) + '%')
-
-                survival_prob_36 = kmf.survival_function_at_times(36).values[0]
-                survival_36mo_col.append(round(survival_prob_36*100, 1).astype(str) + '%')
-                
-                        
-                # Plot survival curve
-                plot_objects = kmf.plot_survival_function(
-                    ax=baseline,
-                    color=color, 
-                    linewidth=3,
-                    alpha=0.8,
-                    ci_alpha=0.1  # Light confidence interval
-                    )
         # Format the plot
     ax = baseline
 
@@ -178,26 +148,27 @@ def create_combined_survival_analysis(survival_data, rate_period, score_tier, co
     plt.yticks(fontsize=14)
     plt.grid(True, alpha=0.3)
     plt.legend(loc='lower left', fontsize=14, framealpha=0.9)
-                
+
     # Add key milestone annotations
     plt.axvline(x=12, color='gray', linestyle='--', alpha=0.5, label='12 Month Mark')
     plt.axvline(x=24, color='gray', linestyle='--', alpha=0.5, label='24 Month Mark')
     plt.axvline(x=36, color='gray', linestyle='--', alpha=0.5, label='36 Month Mark')
-                
+
     # Set axis limits
     plt.xlim(0, max(survival_data['duration_months']) * 1.02)
     plt.ylim(-.02, 1.02)  # Focus on the range where action happens
-                
+
     plt.tight_layout()
-     # Create summary dataframe
+     # Create summary dataframe from the numeric summary
+    summary, _ = summarize_survival_segments(fits)
     survival_rate_summary = pd.DataFrame({
-        'Risk Segment': risk_segment_col,
-        'Default Rate (%)': default_rate_col,
-        'Median Time to Default (months)': median_time_to_default_col,
-        '12 Month Survival Rate (%)': survival_12mo_col,
-        '24 Month Survival Rate (%)': survival_24mo_col,
-        '36 Month Survival Rate (%)': survival_36mo_col,
-        'Number of Defaults': default_size_col
+        'Risk Segment': summary['risk_segment'],
+        'Default Rate (%)': summary['default_rate'].map(format_percent),
+        'Median Time to Default (months)': summary['median_time_to_default'].round(1),
+        '12 Month Survival Rate (%)': summary['survival_12mo'].map(format_percent),
+        '24 Month Survival Rate (%)': summary['survival_24mo'].map(format_percent),
+        '36 Month Survival Rate (%)': summary['survival_36mo'].map(format_percent),
+        'Number of Defaults': summary['defaults']
     })
     #survival_rate_summary.index = survival_rate_summary['Risk Segment']
     #survival_rate_summary.drop(columns=['Risk Segment'], inplace=True)
@@ -205,4 +176,4 @@ def create_combined_survival_analysis(survival_data, rate_period, score_tier, co
     styled_survival_rate_summary = survival_rate_summary.style\
     .set_properties(**{'color': 'black'}, **{'font-size': '14px'})
 
-    return fig, styled_survival_rate_summary
\ No newline at end of file
+    return fig, styled_survival_rate_summary
@@ -0,0 +1,46 @@
+#import packages
+import os
+import subprocess
+import sys
+
+# Modules that batch workers import; none of these should pull in streamlit, matplotlib, lifelines or pyarrow
+modules = ['structure_loan_data', 'baseline_statistics', 'combined_survival_metrics', 'survival_results']
+heavy_modules = ['streamlit', 'matplotlib', 'lifelines', 'scipy', 'pyarrow']
+# Import time each module may add on top of pandas, which every worker loads anyway
+budget_ms = 50
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module):
+    #run `python -X importtime` in a fresh interpreter and parse the cumulative timings (microseconds)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=repo_dir, capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+if __name__ == '__main__':
+    failed = False
+    # pandas itself imports pyarrow when it is installed, so only flag heavy modules pandas does not load
+    pandas_timings = import_time('pandas')
+    for module in modules:
+        timings = import_time(module)
+        loaded_heavy = [name for name in heavy_modules if name in timings and name not in pandas_timings]
+        own_ms = (timings[module] - timings.get('pandas', 0)) / 1000
+        print(f"{module}: {timings[module] / 1000:.1f} ms ({own_ms:.1f} ms beyond pandas)", end='')
+        problems = []
+        if loaded_heavy:
+            problems.append(f"loads {', '.join(loaded_heavy)}")
+        if own_ms > budget_ms:
+            problems.append(f"over the {budget_ms} ms budget")
+        if problems:
+            failed = True
+            print(f"  ({'; '.join(problems)})")
+        else:
+            print()
+    sys.exit(1 if failed else 0)
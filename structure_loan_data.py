@@ -1,10 +1,159 @@
 
+import os
 import pandas as pd
 
+# Raw columns the pipeline uses; readers only load these
+LOAN_DATA_COLUMNS = ['TERM', 'OPEN_DATE', 'LOAN_AMOUNT', 'RATE', 'CREDIT_SCORE_AT_ORIG', '6_MOS_SCORE_CHG', 'STATUS']
 
-def structure_loan_data(loan_data_csv):
+# Credit score buckets, shared by bucketing and score tier filters
+SCORE_BUCKET_BINS = [-1, 599, 649, 729, 900]
+SCORE_BUCKET_LABELS = ['Subprime', 'Near-Prime', 'Prime', 'Super-Prime']
+
+
+def read_csv_loan_data(path, open_date_range=None, score_tiers=None):
+    """
+    Read raw loan data from a CSV file.
+    CSV has no pushdown, so filters are applied after loading.
+    """
+    loan_data_raw = pd.read_csv(path, usecols=LOAN_DATA_COLUMNS)
+    return filter_loan_data(loan_data_raw, open_date_range, score_tiers)
+
+
+def read_parquet_loan_data(path, open_date_range=None, score_tiers=None):
+    """
+    Read raw loan data from a Parquet file or a dataset directory partitioned by open month
+    (e.g. open_month=2023-12/part-0.parquet). open_month values may be YYYY-MM, YYYY-MM-DD, YYYYMM or YYYYMMDD.
+    Columns and filters are pushed down to pyarrow so only matching partitions and row groups are scanned.
+    OPEN_DATE must be stored as a date or timestamp for the date range to be pushed down;
+    text dates (e.g. 12/19/2023) are filtered after loading instead.
+    Parquet has no row key, so the rows come back numbered from 0 in scan order and loan_id is only a
+    row number within one run: it changes with the filters and must not be joined across runs.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.types as pa_types
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    partition_names = set(dataset.schema.names) - set(LOAN_DATA_COLUMNS)
+    open_date_type = dataset.schema.field('OPEN_DATE').type
+    open_date_is_temporal = pa_types.is_temporal(open_date_type)
+
+    filter_expr = ds.field('RATE') > 0
+    start, end = open_date_range if open_date_range is not None else (None, None)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if open_date_is_temporal:
+        if start is not None:
+            filter_expr &= ds.field('OPEN_DATE') >= open_date_scalar(start, open_date_type)
+        if end is not None:
+            filter_expr &= ds.field('OPEN_DATE') < open_date_scalar(end, open_date_type)
+    if (start is not None or end is not None) and 'open_month' in partition_names:
+        open_months = open_month_partitions(dataset, start, end)
+        filter_expr &= ds.field('open_month').isin(pa.array(open_months, type=dataset.schema.field('open_month').type))
+    if score_tiers:
+        score_expr = None
+        for low, high in score_tier_ranges(score_tiers):
+            tier_expr = (ds.field('CREDIT_SCORE_AT_ORIG') > low) & (ds.field('CREDIT_SCORE_AT_ORIG') <= high)
+            score_expr = tier_expr if score_expr is None else score_expr | tier_expr
+        filter_expr &= score_expr
+
+    loan_data_raw = dataset.to_table(columns=LOAN_DATA_COLUMNS, filter=filter_expr).to_pandas()
+    if not open_date_is_temporal:
+        loan_data_raw = filter_loan_data(loan_data_raw, open_date_range).reset_index(drop=True)
+    return loan_data_raw
+
+
+def open_date_scalar(timestamp, open_date_type):
+    #Build a bound for the OPEN_DATE filter in the column's own type and timezone
+    import pyarrow as pa
+    import pyarrow.types as pa_types
+
+    if pa_types.is_timestamp(open_date_type):
+        if open_date_type.tz is not None:
+            timestamp = timestamp.tz_localize(open_date_type.tz) if timestamp.tzinfo is None else timestamp.tz_convert(open_date_type.tz)
+        elif timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        return pa.scalar(timestamp.to_pydatetime(), type=open_date_type)
+    # Dates sit at midnight, so a bound part way through a day applies from the next day
+    return pa.scalar(timestamp.ceil('D').date(), type=open_date_type)
+
+
+def open_month_partitions(dataset, start, end):
+    #List the open_month partition values whose month overlaps [start, end)
+    import pyarrow.dataset as ds
+
+    values = set()
+    for fragment in dataset.get_fragments():
+        value = ds.get_partition_keys(fragment.partition_expression).get('open_month')
+        if value is not None:
+            values.add(value)
+
+    first_month = start.to_period('M') if start is not None else None
+    last_month = (end - pd.Timedelta(1, unit='ns')).to_period('M') if end is not None else None
+    open_months = []
+    for value in values:
+        text = str(value)
+        date_format = {6: '%Y%m', 8: '%Y%m%d'}.get(len(text)) if text.isdigit() else None
+        try:
+            month = pd.to_datetime(text, format=date_format).to_period('M')
+        except (ValueError, TypeError):
+            raise ValueError(f"Unrecognised open_month partition value '{text}'. "
+                             "Expected YYYY-MM, YYYY-MM-DD, YYYYMM or YYYYMMDD.")
+        if (first_month is None or month >= first_month) and (last_month is None or month <= last_month):
+            open_months.append(value)
+    return sorted(open_months)
+
+
+def filter_loan_data(loan_data_raw, open_date_range=None, score_tiers=None):
+    """
+    Apply the open date range and score tier filters to raw loan data in memory.
+    An empty score_tiers list means no score filter, matching the dashboard where no selection shows every tier.
+    The original index is kept so loan_id stays the row position in the source file.
+    """
+    mask = pd.Series(True, index=loan_data_raw.index)
+    start, end = open_date_range if open_date_range is not None else (None, None)
+    if start is not None or end is not None:
+        open_date = pd.to_datetime(loan_data_raw['OPEN_DATE'])
+        if start is not None:
+            mask &= open_date >= pd.Timestamp(start)
+        if end is not None:
+            mask &= open_date < pd.Timestamp(end)
+    if score_tiers:
+        score_mask = pd.Series(False, index=loan_data_raw.index)
+        for low, high in score_tier_ranges(score_tiers):
+            score_mask |= (loan_data_raw['CREDIT_SCORE_AT_ORIG'] > low) & (loan_data_raw['CREDIT_SCORE_AT_ORIG'] <= high)
+        mask &= score_mask
+    return loan_data_raw[mask]
+
+
+def score_tier_ranges(score_tiers):
+    #Map score tier labels to (low, high] credit score ranges
+    ranges = []
+    for tier in score_tiers:
+        if tier not in SCORE_BUCKET_LABELS:
+            raise ValueError(f"Unknown score tier '{tier}'. Expected one of {SCORE_BUCKET_LABELS}.")
+        i = SCORE_BUCKET_LABELS.index(tier)
+        ranges.append((SCORE_BUCKET_BINS[i], SCORE_BUCKET_BINS[i + 1]))
+    return ranges
+
+
+def get_loan_data_reader(path):
+    #Pick a reader from the path: directories and .parquet/.pq files are read as Parquet, anything else as CSV
+    if os.path.isdir(path) or str(path).endswith(('.parquet', '.pq')):
+        return read_parquet_loan_data
+    return read_csv_loan_data
+
+
+def structure_loan_data(loan_data_path, reader=None, open_date_range=None, score_tiers=None):
    
     #Structure the raw loan data into a DataFrame with specific columns.
+    #reader is any callable(path, open_date_range, score_tiers) returning the raw columns in LOAN_DATA_COLUMNS;
+    #by default it is chosen from the path. open_date_range is a (start, end) pair with end exclusive,
+    #score_tiers a list of score bucket labels (empty or None means every tier). Both are pushed down to the
+    #reader where it supports it.
+    #loan_id is the raw row index + 1000. For CSV that is the row position in the file, so it is stable across
+    #filters; Parquet datasets have no row key, so there loan_id is only a row number within this run
+    #and must not be joined across runs.
 
     def bucket_loan_data(loan_data, col, bucket_col, bins, labels):
         
@@ -21,11 +170,13 @@ def structure_loan_data(loan_data_csv):
                     labels=labels
         )
         return loan_data
-    loan_data_raw = pd.read_csv(loan_data_csv)
+    if reader is None:
+        reader = get_loan_data_reader(loan_data_path)
+    loan_data_raw = reader(loan_data_path, open_date_range=open_date_range, score_tiers=score_tiers)
 
     
     # Initialize dataframe for loan data
-    loan_data = pd.DataFrame(columns=['loan_id', 'open_date', 'credit_score', '6_month_credit_score', 'term', 'rate', 'orig_amount', 'status', 'rate_bucket', 'score_bucket', 'orig_amount_bucket', 'open_year', 'open_month', 'open_month_str', 'maturity_date'])
+    loan_data = pd.DataFrame(index=loan_data_raw.index, columns=['loan_id', 'open_date', 'credit_score', '6_month_credit_score', 'term', 'rate', 'orig_amount', 'status', 'rate_bucket', 'score_bucket', 'orig_amount_bucket', 'open_year', 'open_month', 'open_month_str', 'maturity_date'])
 
     loan_data['loan_id'] = loan_data_raw.index + 1000
     loan_data['open_date'] = pd.to_datetime(loan_data_raw['OPEN_DATE'])
@@ -54,11 +205,9 @@ def structure_loan_data(loan_data_csv):
                     )
 
     # Create buckets for credit score
-    score_bucket_bins=[-1, 599, 649, 729, 900]
-    score_bucket_labels=['Subprime', 'Near-Prime', 'Prime', 'Super-Prime']
     loan_data = bucket_loan_data(loan_data, 'credit_score', 'score_bucket',
-                    bins=score_bucket_bins,
-                    labels=score_bucket_labels
+                    bins=SCORE_BUCKET_BINS,
+                    labels=SCORE_BUCKET_LABELS
                     )
 
     # Create buckets for orignal amount
@@ -99,4 +248,16 @@ def prepare_survival_data(loan_data, observation_date=None):
     # Remove any negative durations (data quality issue)
     survival_data = survival_data[survival_data['duration_months'] >= 0]
 
-    return survival_data
\ No newline at end of file
+    return survival_data
+
+
+def assign_risk_segments(survival_data, rate_change_date='2022-04-01'):
+    """
+    Label each loan with its rate period (opened before or after the Fed rate increase)
+    and its combined score tier / rate period segment.
+    """
+    survival_data = survival_data.copy()
+    rate_change_date = pd.Timestamp(rate_change_date)
+    survival_data['rate_status'] = survival_data['open_date'].apply(lambda x: 'Pre-Fed Rate Increase' if x < rate_change_date else 'Post-Fed Rate Increase')
+    survival_data['risk_rate_segment'] = survival_data.apply(lambda row: f"{row['score_bucket']}, {row['rate_status']}", axis=1)
+    return survival_data
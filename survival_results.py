@@ -0,0 +1,198 @@
+#import packages
+import argparse
+import os
+import uuid
+import pandas as pd
+
+#import files
+import structure_loan_data
+import combined_survival_metrics
+
+# Survival horizons compared between runs
+SURVIVAL_COLUMNS = ['survival_12mo', 'survival_24mo', 'survival_36mo']
+
+# Rate periods written by default, matching the dashboard options
+RATE_PERIODS = ['Post-Fed Rate Increase', 'Pre-Fed Rate Increase']
+
+
+def _check_data_version(data_version):
+    #data_version becomes a hive partition directory, so it cannot nest, contain '=' or be hidden from readers
+    data_version = str(data_version)
+    if not data_version or any(c in data_version for c in ('/', '\\', '=')) or data_version[0] in ('.', '_'):
+        raise ValueError(f"Invalid data_version '{data_version}': it must be non-empty, must not contain '/', '\\\\' or '=' "
+                         "and must not start with '.' or '_'.")
+    return data_version
+
+
+def _snapshot_dir(store_path, table_name, data_version, observation_date):
+    observation_date = pd.to_datetime(observation_date).strftime('%Y-%m-%d')
+    return os.path.join(store_path, table_name, f"data_version={_check_data_version(data_version)}",
+                        f"observation_date={observation_date}")
+
+
+def _parquet_files(snapshot_dir):
+    #Committed files only; temporary files start with '.' and are skipped, as pyarrow does
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return [name for name in os.listdir(snapshot_dir) if name.endswith('.parquet') and not name.startswith(('.', '_'))]
+
+
+def snapshot_exists(store_path, data_version, observation_date):
+    #The summary table is written last, so a snapshot is committed once its summary file is in place
+    return len(_parquet_files(_snapshot_dir(store_path, 'summary', data_version, observation_date))) > 0
+
+
+def write_survival_results(store_path, summary, curves, data_version, observation_date):
+    """
+    Append one run's numeric summary table and survival curves to the result store.
+    Each run is stored as Parquet under <store>/<table>/data_version=<v>/observation_date=<date>/.
+    A writer first claims the snapshot by creating a _claim file in its summary directory, so concurrent
+    writers for the same snapshot cannot both proceed. Curves are written first and the summary last,
+    each to a temporary file that is renamed into place, so a run is only visible once its summary exists.
+    The store is append-only: writing a snapshot that already exists or is being written raises a ValueError.
+    A failed write releases its claim; if a writer is killed mid-write, delete the _claim file to retry.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if snapshot_exists(store_path, data_version, observation_date):
+        raise ValueError(f"Snapshot already exists in result store: data_version={data_version}, observation_date={observation_date}")
+
+    snapshot_dirs = {name: _snapshot_dir(store_path, name, data_version, observation_date) for name in ('curves', 'summary')}
+    os.makedirs(snapshot_dirs['summary'], exist_ok=True)
+    claim_path = os.path.join(snapshot_dirs['summary'], '_claim')
+    try:
+        os.close(os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        raise ValueError(f"Snapshot already exists or is being written: data_version={data_version}, observation_date={observation_date}")
+
+    written = []
+    try:
+        for name, data in [('curves', curves), ('summary', summary)]:
+            snapshot_dir = snapshot_dirs[name]
+            os.makedirs(snapshot_dir, exist_ok=True)
+            # Files left behind by an earlier failed write were never committed; the claim makes this safe
+            for leftover in _parquet_files(snapshot_dir):
+                os.remove(os.path.join(snapshot_dir, leftover))
+
+            file_name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp_path = os.path.join(snapshot_dir, f".{file_name}.tmp")
+            written.append(tmp_path)
+            pq.write_table(pa.Table.from_pandas(data, preserve_index=False), tmp_path)
+            os.replace(tmp_path, os.path.join(snapshot_dir, file_name))
+            written.append(os.path.join(snapshot_dir, file_name))
+    except BaseException:
+        for path in written:
+            if os.path.exists(path):
+                os.remove(path)
+        os.remove(claim_path)
+        raise
+    return snapshot_dirs
+
+
+def read_survival_results(store_path, data_version, observation_date, table_name='summary'):
+    """
+    Read one committed snapshot from the result store. Only the snapshot's own directory is listed and read,
+    so reads do not slow down as the store grows.
+    """
+    import pyarrow.dataset as ds
+
+    if not snapshot_exists(store_path, data_version, observation_date):
+        raise ValueError(f"No results for data_version={data_version}, observation_date={observation_date}")
+    snapshot_dir = _snapshot_dir(store_path, table_name, data_version, observation_date)
+    return ds.dataset(snapshot_dir, format='parquet').to_table().to_pandas()
+
+
+def write_survival_snapshot(store_path, loan_data_path, data_version, observation_date,
+                            rate_period=RATE_PERIODS, score_tier=structure_loan_data.SCORE_BUCKET_LABELS):
+    """
+    Load loan data, compute the numeric survival summary and curves for the selected segments
+    and append them to the result store. observation_date uses the MM-DD-YYYY format of prepare_survival_data.
+    Only the selected score tiers are read from the loan data.
+    """
+    _check_data_version(data_version)
+    loan_data = structure_loan_data.structure_loan_data(loan_data_path, score_tiers=list(score_tier))
+    survival_data = structure_loan_data.prepare_survival_data(loan_data, observation_date)
+    survival_data = structure_loan_data.assign_risk_segments(survival_data)
+    summary, curves = combined_survival_metrics.compute_survival_summary(survival_data, list(rate_period), list(score_tier))
+    return write_survival_results(store_path, summary, curves, data_version,
+                                  pd.to_datetime(observation_date, format='%m-%d-%Y'))
+
+
+def diff_survival_results(base, compare, threshold=0.02):
+    """
+    Compare two summary snapshots and flag segments whose 12/24/36 month survival moved by more than threshold.
+    Survival values are fractions, so threshold=0.02 is two percentage points.
+    Segments present in only one snapshot are always flagged as added or removed, and segments that
+    lost or gained all their loans (survival NaN on one side only) as emptied or populated.
+    """
+    merged = base[['risk_segment'] + SURVIVAL_COLUMNS].merge(
+        compare[['risk_segment'] + SURVIVAL_COLUMNS], on='risk_segment', how='outer',
+        suffixes=('_base', '_compare'), indicator=True)
+
+    diff = pd.DataFrame({'risk_segment': merged['risk_segment'],
+                         'status': merged['_merge'].astype(str).map({'both': 'changed', 'left_only': 'removed', 'right_only': 'added'})})
+    both = merged['_merge'] == 'both'
+    flagged = ~both
+    for col in SURVIVAL_COLUMNS:
+        diff[f"{col}_change"] = merged[f"{col}_compare"] - merged[f"{col}_base"]
+        flagged |= diff[f"{col}_change"].abs() > threshold
+        # NaN minus a number is NaN, so catch segments that are empty on one side only
+        flagged |= both & (merged[f"{col}_base"].isna() != merged[f"{col}_compare"].isna())
+
+    base_empty = merged[[f"{col}_base" for col in SURVIVAL_COLUMNS]].isna().all(axis=1)
+    compare_empty = merged[[f"{col}_compare" for col in SURVIVAL_COLUMNS]].isna().all(axis=1)
+    diff.loc[both & ~base_empty & compare_empty, 'status'] = 'emptied'
+    diff.loc[both & base_empty & ~compare_empty, 'status'] = 'populated'
+    return diff[flagged].reset_index(drop=True)
+
+
+def _snapshot_arg(value):
+    #Parse '<data_version>@<observation_date>'
+    data_version, sep, observation_date = value.rpartition('@')
+    if not sep or not data_version:
+        raise argparse.ArgumentTypeError("Snapshots must be given as <data_version>@<observation_date>")
+    return data_version, observation_date
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write and compare survival summary snapshots in the result store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write_parser = subparsers.add_parser('write', help="Compute survival results for a loan data file and append them to the store")
+    write_parser.add_argument('store', help="Path to the result store")
+    write_parser.add_argument('loan_data', help="Loan data CSV or Parquet path")
+    write_parser.add_argument('--data-version', required=True, help="Version of the loan data export")
+    write_parser.add_argument('--observation-date', required=True, help="Observation date as MM-DD-YYYY")
+    write_parser.add_argument('--rate-period', nargs='*', default=RATE_PERIODS, choices=RATE_PERIODS)
+    write_parser.add_argument('--score-tier', nargs='*', default=structure_loan_data.SCORE_BUCKET_LABELS,
+                              choices=structure_loan_data.SCORE_BUCKET_LABELS)
+
+    diff_parser = subparsers.add_parser('diff', help="Compare two snapshots in the store",
+                                        description="Compare two snapshots in the store. Exit codes: 0 when no segment "
+                                                    "moved beyond the threshold, 1 when segments were flagged, "
+                                                    "2 for invalid arguments or a missing snapshot.")
+    diff_parser.add_argument('store', help="Path to the result store")
+    diff_parser.add_argument('base', type=_snapshot_arg, help="Base snapshot as <data_version>@<observation_date>")
+    diff_parser.add_argument('compare', type=_snapshot_arg, help="Snapshot to compare as <data_version>@<observation_date>")
+    diff_parser.add_argument('--threshold', type=float, default=0.02,
+                             help="Flag segments whose survival moved by more than this fraction (default 0.02)")
+    args = parser.parse_args()
+
+    if args.command == 'write':
+        snapshot_dirs = write_survival_snapshot(args.store, args.loan_data, args.data_version, args.observation_date,
+                                                args.rate_period, args.score_tier)
+        print(f"Wrote {snapshot_dirs['summary']}")
+        raise SystemExit(0)
+
+    try:
+        base = read_survival_results(args.store, *args.base)
+        compare = read_survival_results(args.store, *args.compare)
+    except ValueError as e:
+        diff_parser.error(str(e))
+    diff = diff_survival_results(base, compare, args.threshold)
+    if diff.empty:
+        print("No segments moved beyond the threshold.")
+    else:
+        print(diff.to_string(index=False))
+    raise SystemExit(1 if not diff.empty else 0)
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Batch workers import these; fitting, plotting and UI libraries must only load when used
+WORKER_MODULES = ['structure_loan_data', 'baseline_statistics', 'combined_survival_metrics', 'survival_results']
+HEAVY_MODULES = ['lifelines', 'matplotlib', 'streamlit', 'scipy']
+
+
+def test_worker_modules_do_not_import_heavy_libraries():
+    code = (f"import sys, {', '.join(WORKER_MODULES)}\n"
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
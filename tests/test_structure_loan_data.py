@@ -0,0 +1,99 @@
+import os
+import pandas as pd
+import pytest
+
+import structure_loan_data
+
+LOAN_DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loan_data.csv')
+
+FILTERS = [
+    (None, None),
+    (('2022-04-01', None), None),
+    ((None, '2022-04-01'), ['Prime']),
+    (('2023-01-15', '2024-06-20'), ['Subprime', 'Super-Prime']),
+    (None, []),
+]
+
+
+@pytest.fixture(scope='module')
+def parquet_paths(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('loan_data')
+    raw = pd.read_csv(LOAN_DATA_CSV)
+
+    # Unchanged export: OPEN_DATE stays as text like 12/19/2023
+    naive_path = str(tmp_path / 'naive.parquet')
+    raw.to_parquet(naive_path)
+
+    # Warehouse layout: typed OPEN_DATE, partitioned by open month
+    typed = raw.copy()
+    typed['OPEN_DATE'] = pd.to_datetime(typed['OPEN_DATE'])
+    typed['open_month'] = typed['OPEN_DATE'].dt.strftime('%Y-%m')
+    partitioned_path = str(tmp_path / 'partitioned')
+    typed.to_parquet(partitioned_path, partition_cols=['open_month'])
+
+    # Other warehouse layouts: integer YYYYMM and day-level partitions, date-only and UTC OPEN_DATE
+    int_month = typed.assign(open_month=typed['OPEN_DATE'].dt.strftime('%Y%m').astype(int))
+    int_month_path = str(tmp_path / 'int_month')
+    int_month.to_parquet(int_month_path, partition_cols=['open_month'])
+
+    day_month = typed.assign(open_month=typed['OPEN_DATE'].dt.to_period('M').dt.start_time.dt.strftime('%Y-%m-%d'),
+                             OPEN_DATE=typed['OPEN_DATE'].dt.date)
+    day_month_path = str(tmp_path / 'day_month')
+    day_month.to_parquet(day_month_path, partition_cols=['open_month'])
+
+    utc_path = str(tmp_path / 'utc.parquet')
+    raw.assign(OPEN_DATE=typed['OPEN_DATE'].dt.tz_localize('UTC')).to_parquet(utc_path)
+    return [naive_path, partitioned_path, int_month_path, day_month_path, utc_path]
+
+
+def comparable(loan_data):
+    #loan_id is a row number for Parquet, so compare on the loan attributes only.
+    #Missing text values come back as NaN from CSV and None from Parquet, so treat them alike
+    loan_data = loan_data.drop(columns=['loan_id']).astype({'status': object, '6_month_credit_score': object})
+    for col in ['open_date', 'maturity_date']:
+        if loan_data[col].dt.tz is not None:
+            loan_data[col] = loan_data[col].dt.tz_localize(None)
+    loan_data = loan_data.where(loan_data.notna(), None)
+    return loan_data.sort_values(['open_date', 'credit_score', 'orig_amount', 'rate']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('open_date_range, score_tiers', FILTERS)
+def test_parquet_matches_csv(parquet_paths, open_date_range, score_tiers):
+    expected = structure_loan_data.structure_loan_data(LOAN_DATA_CSV, open_date_range=open_date_range, score_tiers=score_tiers)
+    assert len(expected) > 0
+    for path in parquet_paths:
+        result = structure_loan_data.structure_loan_data(path, open_date_range=open_date_range, score_tiers=score_tiers)
+        pd.testing.assert_frame_equal(comparable(result), comparable(expected), check_dtype=False, check_categorical=False)
+
+
+def test_csv_filters_keep_loan_id():
+    full = structure_loan_data.structure_loan_data(LOAN_DATA_CSV).set_index('loan_id')
+    filtered = structure_loan_data.structure_loan_data(LOAN_DATA_CSV, open_date_range=('2022-04-01', None), score_tiers=['Prime'])
+    assert (filtered['score_bucket'] == 'Prime').all()
+    assert (filtered['open_date'] >= pd.Timestamp('2022-04-01')).all()
+    pd.testing.assert_series_equal(filtered.set_index('loan_id')['open_date'], full.loc[filtered['loan_id'], 'open_date'])
+
+
+def test_open_month_partitions_are_pruned(parquet_paths):
+    import pyarrow.dataset as ds
+    for path, first, last in [(parquet_paths[1], '2023-01', '2024-06'), (parquet_paths[2], 202301, 202406),
+                              (parquet_paths[3], '2023-01-01', '2024-06-01')]:
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        open_months = structure_loan_data.open_month_partitions(dataset, pd.Timestamp('2023-01-15'), pd.Timestamp('2024-06-20'))
+        assert (open_months[0], open_months[-1], len(open_months)) == (first, last, 18)
+
+
+def test_parquet_loan_id_is_a_row_number(parquet_paths):
+    for path in parquet_paths[:2]:
+        filtered = structure_loan_data.structure_loan_data(path, open_date_range=('2022-04-01', None), score_tiers=['Prime'])
+        assert filtered['loan_id'].tolist() == list(range(1000, 1000 + len(filtered)))
+
+
+def test_empty_score_tiers_means_no_filter():
+    assert len(structure_loan_data.structure_loan_data(LOAN_DATA_CSV, score_tiers=[])) == \
+        len(structure_loan_data.structure_loan_data(LOAN_DATA_CSV))
+
+
+def test_unknown_score_tier():
+    with pytest.raises(ValueError, match='Unknown score tier'):
+        structure_loan_data.structure_loan_data(LOAN_DATA_CSV, score_tiers=['Platinum'])
@@ -0,0 +1,156 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import structure_loan_data
+import combined_survival_metrics
+import survival_results
+
+LOAN_DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'loan_data.csv')
+RATE_PERIODS = ['Post-Fed Rate Increase', 'Pre-Fed Rate Increase']
+
+
+def make_summary(values):
+    #values maps risk segment -> (12, 24, 36 month survival)
+    return pd.DataFrame([{'risk_segment': segment, 'survival_12mo': s12, 'survival_24mo': s24, 'survival_36mo': s36}
+                         for segment, (s12, s24, s36) in values.items()])
+
+
+@pytest.fixture(scope='module')
+def survival_data():
+    loan_data = structure_loan_data.structure_loan_data(LOAN_DATA_CSV, score_tiers=['Prime'])
+    survival_data = structure_loan_data.prepare_survival_data(loan_data, '01-31-2025')
+    return structure_loan_data.assign_risk_segments(survival_data)
+
+
+def test_diff_flags_moves_beyond_threshold():
+    base = make_summary({'A': (0.95, 0.90, 0.85), 'B': (0.95, 0.90, 0.85)})
+    compare = make_summary({'A': (0.94, 0.89, 0.84), 'B': (0.95, 0.90, 0.80)})
+    diff = survival_results.diff_survival_results(base, compare, threshold=0.02)
+    assert diff['risk_segment'].tolist() == ['B']
+    assert diff.loc[0, 'status'] == 'changed'
+    assert diff.loc[0, 'survival_36mo_change'] == pytest.approx(-0.05)
+    assert survival_results.diff_survival_results(base, compare, threshold=0.1).empty
+
+
+def test_diff_flags_added_and_removed_segments():
+    base = make_summary({'A': (0.95, 0.90, 0.85), 'B': (0.95, 0.90, 0.85)})
+    compare = make_summary({'A': (0.95, 0.90, 0.85), 'C': (0.95, 0.90, 0.85)})
+    diff = survival_results.diff_survival_results(base, compare, threshold=0.02).set_index('risk_segment')
+    assert diff['status'].to_dict() == {'B': 'removed', 'C': 'added'}
+
+
+def test_diff_flags_emptied_and_populated_segments():
+    base = make_summary({'A': (0.9, 0.8, 0.7), 'B': (np.nan, np.nan, np.nan), 'C': (np.nan, np.nan, np.nan)})
+    compare = make_summary({'A': (np.nan, np.nan, np.nan), 'B': (0.5, 0.5, 0.5), 'C': (np.nan, np.nan, np.nan)})
+    diff = survival_results.diff_survival_results(base, compare, threshold=0.02).set_index('risk_segment')
+    assert diff['status'].to_dict() == {'A': 'emptied', 'B': 'populated'}
+
+
+def test_concurrent_writer_is_rejected(tmp_path):
+    store = str(tmp_path / 'store')
+    summary = make_summary({'A': (0.95, 0.90, 0.85)})
+    curves = pd.DataFrame({'risk_segment': ['A'], 'timeline': [0.0], 'survival': [1.0]})
+
+    # Another writer holds the claim but has not committed its summary yet
+    summary_dir = os.path.join(store, 'summary', 'data_version=v1', 'observation_date=2025-01-31')
+    os.makedirs(summary_dir)
+    open(os.path.join(summary_dir, '_claim'), 'w').close()
+    with pytest.raises(ValueError, match='being written'):
+        survival_results.write_survival_results(store, summary, curves, 'v1', '2025-01-31')
+    assert not os.path.exists(os.path.join(store, 'curves'))
+
+
+def test_diff_cli_exit_codes(tmp_path):
+    import subprocess
+    import sys
+    store = str(tmp_path / 'store')
+    survival_results.write_survival_results(store, make_summary({'A': (0.95, 0.90, 0.85)}),
+                                            pd.DataFrame({'risk_segment': ['A'], 'timeline': [0.0], 'survival': [1.0]}),
+                                            'v1', '2025-01-31')
+    survival_results.write_survival_results(store, make_summary({'A': (0.90, 0.90, 0.85)}),
+                                            pd.DataFrame({'risk_segment': ['A'], 'timeline': [0.0], 'survival': [1.0]}),
+                                            'v2', '2025-02-28')
+
+    def run_diff(base, compare):
+        return subprocess.run([sys.executable, survival_results.__file__, 'diff', store, base, compare],
+                              capture_output=True, text=True).returncode
+
+    assert run_diff('v1@2025-01-31', 'v1@2025-01-31') == 0
+    assert run_diff('v1@2025-01-31', 'v2@2025-02-28') == 1
+    assert run_diff('v1@2025-01-31', 'v3@2025-01-31') == 2
+
+
+def test_empty_segments_get_nan_rows(survival_data):
+    summary, curves = combined_survival_metrics.compute_survival_summary(survival_data, RATE_PERIODS, ['Prime', 'Subprime'])
+    subprime = summary[summary['risk_segment'].str.startswith('Subprime')]
+    assert len(subprime) == 2
+    assert (subprime['sample_size'] == 0).all() and (subprime['defaults'] == 0).all()
+    assert subprime[['default_rate'] + survival_results.SURVIVAL_COLUMNS].isna().all().all()
+    assert not curves['risk_segment'].str.startswith('Subprime').any()
+    prime = summary[summary['risk_segment'].str.startswith('Prime')]
+    assert (prime['sample_size'] > 0).all() and prime['survival_12mo'].between(0, 1).all()
+
+
+def test_styled_table_matches_numeric_summary(survival_data):
+    # Rate period only: previously the survival columns were never filled for this selection
+    pytest.importorskip('jinja2')
+    summary, _ = combined_survival_metrics.compute_survival_summary(survival_data, RATE_PERIODS, [])
+    fig, styled = combined_survival_metrics.create_combined_survival_analysis(survival_data, RATE_PERIODS, [], [], baseline=True)
+    table = styled.data
+    assert table['Risk Segment'].tolist() == RATE_PERIODS
+    assert table['12 Month Survival Rate (%)'].tolist() == summary['survival_12mo'].map(combined_survival_metrics.format_percent).tolist()
+
+
+def test_write_and_read_snapshot(tmp_path, survival_data):
+    summary, curves = combined_survival_metrics.compute_survival_summary(survival_data, RATE_PERIODS, ['Prime'])
+    store = str(tmp_path / 'store')
+    survival_results.write_survival_results(store, summary, curves, 'v1', '2025-01-31')
+    pd.testing.assert_frame_equal(survival_results.read_survival_results(store, 'v1', '2025-01-31'), summary)
+    assert len(survival_results.read_survival_results(store, 'v1', '2025-01-31', 'curves')) == len(curves)
+    with pytest.raises(ValueError, match='already exists'):
+        survival_results.write_survival_results(store, summary, curves, 'v1', '2025-01-31')
+
+
+def test_uncommitted_snapshot_can_be_rewritten(tmp_path, monkeypatch):
+    store = str(tmp_path / 'store')
+    summary = make_summary({'A': (0.95, 0.90, 0.85)})
+    curves = pd.DataFrame({'risk_segment': ['A'], 'timeline': [0.0], 'survival': [1.0]})
+
+    # Fail while writing the summary, after the curves are in place
+    import pyarrow.parquet as pq
+    original_write_table = pq.write_table
+    calls = []
+
+    def failing_write_table(table, path, *args, **kwargs):
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError('disk full')
+        return original_write_table(table, path, *args, **kwargs)
+
+    monkeypatch.setattr(pq, 'write_table', failing_write_table)
+    with pytest.raises(OSError):
+        survival_results.write_survival_results(store, summary, curves, 'v1', '2025-01-31')
+    monkeypatch.setattr(pq, 'write_table', original_write_table)
+
+    assert not survival_results.snapshot_exists(store, 'v1', '2025-01-31')
+    with pytest.raises(ValueError, match='No results'):
+        survival_results.read_survival_results(store, 'v1', '2025-01-31', 'curves')
+    survival_results.write_survival_results(store, summary, curves, 'v1', '2025-01-31')
+    assert len(survival_results.read_survival_results(store, 'v1', '2025-01-31', 'curves')) == 1
+
+
+@pytest.mark.parametrize('data_version', ['', 'a/b', 'v=1', '.hidden', '_tmp'])
+def test_invalid_data_version(tmp_path, data_version):
+    summary = make_summary({'A': (0.95, 0.90, 0.85)})
+    with pytest.raises(ValueError, match='Invalid data_version'):
+        survival_results.write_survival_results(str(tmp_path), summary, summary, data_version, '2025-01-31')
+
+
+def test_write_snapshot_from_loan_data(tmp_path):
+    store = str(tmp_path / 'store')
+    survival_results.write_survival_snapshot(store, LOAN_DATA_CSV, '2025-01', '01-31-2025', score_tier=['Prime', 'Subprime'])
+    summary = survival_results.read_survival_results(store, '2025-01', '2025-01-31')
+    assert sorted(summary['risk_segment']) == sorted(f"{score}, {rate}" for rate in RATE_PERIODS for score in ['Prime', 'Subprime'])
+    assert np.all(summary['sample_size'] > 0)